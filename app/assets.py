@@ -0,0 +1,189 @@
+# app/assets.py (plot asset server: in-memory index, conditional requests, precompressed variants)
+
+import gzip
+import os
+import shutil
+import threading
+import time
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+
+PLOTS_DIR = "plots"
+PLOTLY_BUNDLE = "plotly.min.js"
+PLOTLY_SRC = f"/{PLOTS_DIR}/{PLOTLY_BUNDLE}"  # what generated plot HTML points at
+PLOTLY_SCRIPT = f'<script charset="utf-8" src="{PLOTLY_SRC}"></script>'
+
+RESCAN_SECONDS = 1.0
+PLOT_MAX_AGE = 60
+BUNDLE_MAX_AGE = 86400
+COMPRESSIBLE = (".html", ".js", ".css", ".json", ".svg")
+ENCODINGS = [("br", ".br"), ("gzip", ".gz")]  # server preference order
+MEDIA_TYPES = {
+    ".html": "text/html; charset=utf-8",
+    ".js": "application/javascript",
+    ".png": "image/png",
+    ".pdf": "application/pdf",
+    ".css": "text/css",
+    ".json": "application/json",
+    ".svg": "image/svg+xml",
+}
+
+
+class Asset:
+    def __init__(self, path: str, stat: os.stat_result):
+        self.path = path
+        self.size = stat.st_size
+        self.mtime = stat.st_mtime
+        self.etag = f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.media_type = MEDIA_TYPES.get(os.path.splitext(path)[1], "application/octet-stream")
+        self.variants = {}  # encoding -> path of an up-to-date precompressed copy
+
+
+class AssetIndex:
+    """Snapshot of the plots directory, rescanned at most every RESCAN_SECONDS."""
+
+    def __init__(self, directory: str = PLOTS_DIR, rescan_seconds: float = RESCAN_SECONDS):
+        self.directory = directory
+        self.rescan_seconds = rescan_seconds
+        self.generation = 0
+        self._files = {}
+        self._signature = None
+        self._checked = 0.0
+        self._lock = threading.Lock()
+
+    def refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and now - self._checked < self.rescan_seconds:
+            return
+        with self._lock:
+            if not force and now - self._checked < self.rescan_seconds:
+                return
+            self._checked = now
+            try:
+                entries = {e.name: e.stat() for e in os.scandir(self.directory) if e.is_file()}
+            except FileNotFoundError:
+                entries = {}
+            signature = sorted((n, s.st_size, s.st_mtime_ns) for n, s in entries.items())
+            if signature == self._signature:
+                return
+
+            files = {}
+            for name, stat in entries.items():
+                if name.endswith((".gz", ".br")):
+                    continue
+                asset = Asset(os.path.join(self.directory, name), stat)
+                for encoding, suffix in ENCODINGS:
+                    variant = entries.get(name + suffix)
+                    if variant is not None and variant.st_mtime >= stat.st_mtime:
+                        asset.variants[encoding] = asset.path + suffix
+                files[name] = asset
+            # Extension-less aliases (xgb_vs_actual -> .html, falling back to .png)
+            for name, asset in list(files.items()):
+                stem, ext = os.path.splitext(name)
+                if ext == ".html" or (ext == ".png" and stem + ".html" not in files):
+                    files[stem] = asset
+
+            self._files = files
+            self._signature = signature
+            self.generation += 1
+
+    def get(self, name: str):
+        self.refresh()
+        return self._files.get(name)
+
+    def response(self, request: Request, name: str):
+        asset = self.get(name)
+        if asset is None:
+            return None
+
+        path, etag, encoding = asset.path, asset.etag, None
+        accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+        # Highest client q-value wins; max() keeps the server preference order on ties
+        candidates = [
+            (accepted.get(name, accepted.get("*", 0.0)), name, suffix)
+            for name, suffix in ENCODINGS
+            if name in asset.variants
+        ]
+        q, candidate, suffix = max(candidates, key=lambda c: c[0], default=(0.0, None, None))
+        if q > 0:
+            path, encoding = asset.variants[candidate], candidate
+            etag = f'{asset.etag[:-1]}-{suffix[1:]}"'
+
+        max_age = BUNDLE_MAX_AGE if name == PLOTLY_BUNDLE else PLOT_MAX_AGE
+        headers = {
+            "ETag": etag,
+            "Last-Modified": asset.last_modified,
+            "Cache-Control": f"public, max-age={max_age}",
+            "Vary": "Accept-Encoding",
+        }
+        if not_modified(request, etag, asset.mtime):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+        return FileResponse(path, media_type=asset.media_type, headers=headers)
+
+
+def _accepted_encodings(header: str) -> dict:
+    """Accept-Encoding as {coding: q}; `gzip;q=0` means gzip is refused."""
+    accepted = {}
+    for part in header.split(","):
+        coding, *params = (p.strip() for p in part.split(";"))
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding.lower()] = q
+    return accepted
+
+
+def not_modified(request: Request, etag: str, mtime: float = None) -> bool:
+    """Conditional GET check: If-None-Match (weak tags, lists, `*`), else If-Modified-Since."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [t.strip().removeprefix("W/") for t in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and mtime is not None:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+# === Offline helpers (used by the plot generators) ===
+def write_plotly_bundle(directory: str = PLOTS_DIR) -> str:
+    """Write the shared plotly.js bundle that plot HTML references via PLOTLY_SRC."""
+    from plotly.offline import get_plotlyjs
+
+    path = os.path.join(directory, PLOTLY_BUNDLE)
+    bundle = get_plotlyjs()
+    if not os.path.exists(path) or os.path.getsize(path) != len(bundle.encode("utf-8")):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(bundle)
+    return path
+
+
+def precompress(directory: str = PLOTS_DIR) -> None:
+    """Write .gz siblings for text assets that are missing or stale."""
+    for entry in os.scandir(directory):
+        if not entry.is_file() or not entry.name.endswith(COMPRESSIBLE):
+            continue
+        target = entry.path + ".gz"
+        if os.path.exists(target) and os.path.getmtime(target) >= entry.stat().st_mtime:
+            continue
+        with open(entry.path, "rb") as src, gzip.open(target, "wb", compresslevel=9) as dst:
+            shutil.copyfileobj(src, dst)
+        print(f"✅ Compressed: {target}")
+
+
+plot_assets = AssetIndex()
@@ -1,49 +1,213 @@
-# app/model.py
+# app/model.py (serving-side model loading; training code lives in app/training.py)
 
-import pandas as pd
 import numpy as np
 import pickle
+import hashlib
+import json
 import os
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from xgboost import XGBRegressor
+import threading
 
 MODEL_DIR = "models"
 MODEL_PATH = os.path.join(MODEL_DIR, "xgb_model.pkl")
+FOREST_PATH = os.path.join(MODEL_DIR, "xgb_forest.npz")
+# Objectives whose prediction is the raw margin (the forest doesn't apply link functions)
+IDENTITY_OBJECTIVES = {
+    "reg:squarederror",
+    "reg:linear",
+    "reg:absoluteerror",
+    "reg:pseudohubererror",
+    "reg:quantileerror",
+}
+# Batches this large go to the xgboost booster once it has loaded in the background.
+# Single-threaded, repo model: forest 0.05 ms vs booster 0.16 ms for 1 row, 0.23 vs 0.31 ms
+# for 16 rows, 1.3 vs 1.1 ms for 64 rows and 226 vs 78 ms for 10,000 rows.
+BOOSTER_MIN_ROWS = int(os.environ.get("BOOSTER_MIN_ROWS", "32"))
 
 
-def load_data(filepath: str) -> pd.DataFrame:
-    df = pd.read_csv(filepath)
-    df["datetime"] = pd.to_datetime(df["date"])
-    df["Hour"] = 0  # static for daily aggregate
-    df["Day"] = df["datetime"].dt.day
-    df["DayOfWeek"] = df["datetime"].dt.dayofweek
-    df["Month"] = df["datetime"].dt.month
-    return df
+class FlatForest:
+    """XGBoost trees flattened into NumPy arrays.
 
+    Predicts exactly like the booster for numeric inputs, but without importing
+    xgboost (which pulls in pandas and scikit-learn) on the serving path.
+    """
 
-def preprocess_data(df: pd.DataFrame) -> tuple:
-    X = df[["Hour", "Day", "DayOfWeek", "Month", "active_vehicles"]]
-    y = df["trips"]
-    return train_test_split(X, y, test_size=0.3, random_state=42)
+    def __init__(self, feature, threshold, left, right, default_left, roots, base_score, max_depth):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.default_left = default_left
+        self.roots = roots
+        self.base_score = float(base_score)
+        self.max_depth = int(max_depth)
+        # Flat lookup tables for predict(): children[go_left * n_nodes + node]
+        self._feature = feature.astype(np.intp)
+        self._children = np.concatenate([right, left]).astype(np.intp)
+        self._roots = roots.astype(np.intp)
 
+    @classmethod
+    def from_booster(cls, booster) -> "FlatForest":
+        learner = json.loads(booster.save_raw("json"))["learner"]
+        if learner["gradient_booster"]["name"] != "gbtree":
+            raise ValueError("Only gbtree boosters can be flattened")
+        # predict() returns the raw margin, which is the prediction only for identity links
+        objective = learner["objective"]["name"]
+        if objective not in IDENTITY_OBJECTIVES:
+            raise ValueError(f"Objective {objective} has a non-identity link and can't be flattened")
+        params = learner["learner_model_param"]
+        if int(params.get("num_target", "1")) > 1 or int(params.get("num_class", "0")) > 1:
+            raise ValueError("Only single-output boosters can be flattened")
+        if booster.attr("best_iteration") is not None:
+            raise ValueError("Early-stopped boosters can't be flattened (predict uses best_iteration)")
+        base_score = float(params["base_score"].strip("[]"))
 
-def train_and_save_model(filepath: str = "data/Uber-Jan-Feb-FOIL.csv") -> None:
-    df = load_data(filepath)
-    X_train, X_test, y_train, y_test = preprocess_data(df)
-    model = XGBRegressor(
-        objective="reg:squarederror", n_estimators=300, max_depth=6, learning_rate=0.1
-    )
-    model.fit(X_train, y_train)
-    os.makedirs(MODEL_DIR, exist_ok=True)
-    with open(MODEL_PATH, "wb") as f:
-        pickle.dump(model, f)
-    print(f"✅ Model trained and saved to {MODEL_PATH}")
+        feature, threshold, left, right, default_left, roots = [], [], [], [], [], []
+        max_depth = 0
+        for tree in learner["gradient_booster"]["model"]["trees"]:
+            if any(tree.get("split_type", [])):
+                raise ValueError("Categorical splits can't be flattened")
+            offset = len(feature)
+            roots.append(offset)
+            depth = {0: 0}
+            for node, (lc, rc) in enumerate(zip(tree["left_children"], tree["right_children"])):
+                if lc == -1:
+                    # Leaves point at themselves so extra descent steps are no-ops
+                    lc = rc = node
+                else:
+                    depth[lc] = depth[rc] = depth[node] + 1
+                feature.append(tree["split_indices"][node])
+                threshold.append(tree["split_conditions"][node])  # leaf value on leaves
+                left.append(offset + lc)
+                right.append(offset + rc)
+                default_left.append(bool(tree["default_left"][node]))
+            max_depth = max(max_depth, max(depth.values()))
 
+        return cls(
+            np.array(feature, dtype=np.int32),
+            np.array(threshold, dtype=np.float32),
+            np.array(left, dtype=np.int32),
+            np.array(right, dtype=np.int32),
+            np.array(default_left, dtype=bool),
+            np.array(roots, dtype=np.int32),
+            base_score,
+            max_depth,
+        )
+
+    @classmethod
+    def load(cls, path: str = FOREST_PATH) -> "FlatForest":
+        with np.load(path) as data:
+            return cls(
+                data["feature"],
+                data["threshold"],
+                data["left"],
+                data["right"],
+                data["default_left"],
+                data["roots"],
+                data["base_score"],
+                data["max_depth"],
+            )
+
+    def save(self, path: str = FOREST_PATH, source_sha256: str = "") -> None:
+        np.savez(
+            path,
+            source_sha256=source_sha256,
+            feature=self.feature,
+            threshold=self.threshold,
+            left=self.left,
+            right=self.right,
+            default_left=self.default_left,
+            roots=self.roots,
+            base_score=self.base_score,
+            max_depth=self.max_depth,
+        )
+
+    def predict(self, X) -> np.ndarray:
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        n_nodes = len(self.threshold)
+        # Gather through the flattened input with 1-D indices (much cheaper than X[rows, cols])
+        flat = X.ravel()
+        base = (np.arange(len(X), dtype=np.intp) * X.shape[1])[:, None]
+        node = np.tile(self._roots, (len(X), 1))
+        has_nan = bool(np.isnan(flat).any())
+        for _ in range(self.max_depth):
+            x = flat[base + self._feature[node]]
+            go_left = x < self.threshold[node]
+            if has_nan:
+                go_left = np.where(np.isnan(x), self.default_left[node], go_left)
+            node = self._children[go_left * n_nodes + node]
+        return self.base_score + self.threshold[node].sum(axis=1, dtype=np.float32)
+
+
+class ServingModel:
+    """Flattened forest from the first request; the xgboost booster for batches once loaded.
+
+    The forest needs no xgboost import, so workers start fast and predict single rows
+    faster than the booster. The booster scales far better on batches, so it is
+    unpickled in a background thread after startup and takes over from BOOSTER_MIN_ROWS.
+    """
+
+    def __init__(self, forest: FlatForest, model_path: str = MODEL_PATH):
+        self.forest = forest
+        self.model_path = model_path
+        self.booster = None
+        self._thread = None
+
+    def load_booster_in_background(self) -> None:
+        if self._thread is None and os.path.exists(self.model_path):
+            self._thread = threading.Thread(target=self._load_booster, name="booster-loader", daemon=True)
+            self._thread.start()
+
+    def _load_booster(self) -> None:
+        try:
+            with open(self.model_path, "rb") as f:
+                booster = pickle.load(f).get_booster()
+            # One worker per core (gunicorn.conf.py), so one thread per booster
+            booster.set_param({"nthread": 1})
+            self.booster = booster
+            print("✅ Booster loaded for batched inference")
+        except Exception as e:
+            print("❌ Booster failed to load, batches stay on the forest:", str(e))
+
+    def predict(self, X) -> np.ndarray:
+        booster = self.booster
+        if booster is not None and len(X) >= BOOSTER_MIN_ROWS:
+            return booster.inplace_predict(np.asarray(X, dtype=np.float32))
+        return self.forest.predict(X)
+
+
+def _file_sha256(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def forest_source(path: str = FOREST_PATH) -> str:
+    """sha256 of the pickle the forest was exported from ("" if unknown)."""
+    with np.load(path) as data:
+        return str(data["source_sha256"]) if "source_sha256" in data.files else ""
+
+
+def export_forest(model, path: str = FOREST_PATH, source: str = MODEL_PATH) -> None:
+    # Callers pickle the model first; its hash ties the forest to that exact pickle
+    digest = _file_sha256(source) if os.path.exists(source) else ""
+    FlatForest.from_booster(model.get_booster()).save(path, source_sha256=digest)
+    print(f"✅ Flattened forest saved to {path}")
+
+
+def load_model():
+    # Prefer the flattened forest when it was exported from the current pickle
+    # (content hash, not mtime: a fresh checkout gives both files arbitrary mtimes)
+    if os.path.exists(FOREST_PATH) and (
+        not os.path.exists(MODEL_PATH) or forest_source(FOREST_PATH) == _file_sha256(MODEL_PATH)
+    ):
+        return ServingModel(FlatForest.load(FOREST_PATH))
 
-def load_model() -> XGBRegressor:
     if not os.path.exists(MODEL_PATH):
         raise FileNotFoundError(f"❌ Model not found at {MODEL_PATH}")
     with open(MODEL_PATH, "rb") as f:
         model = pickle.load(f)
+
+    # Pin per-process inference threads (see gunicorn.conf.py for worker sizing)
+    threads = os.environ.get("MODEL_THREADS")
+    if threads:
+        model.set_params(n_jobs=int(threads))
     return model
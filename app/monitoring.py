@@ -0,0 +1,469 @@
+# app/monitoring.py (online drift & accuracy monitoring with streaming aggregates)
+#
+# The request path only appends a tuple to a deque (thread-safe, ~1 microsecond).
+# A background thread drains that queue every FLUSH_SECONDS and folds it into:
+#   - per-feature histograms (lifetime + rolling window used for PSI)
+#   - a t-digest sketch of predicted trips (p50/p90/p99)
+#   - a reservoir sample of served (features, prediction) rows
+#   - a join of predictions with actual trip counts ingested later -> rolling MAPE
+#
+# Under gunicorn an actual can be posted to any worker, so the join runs against a
+# SQLite store (MONITOR_DB) shared by the workers of one gunicorn master. Each flush
+# also publishes the worker's aggregates there, and /monitoring merges every live worker.
+# gunicorn.conf.py points MONITOR_DB at a fresh file per master; without it (uvicorn,
+# loadtest.py, tests) each process gets a private store that is removed on shutdown.
+
+import csv
+import json
+import math
+import os
+import random
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+FEATURES = ["hour", "day", "day_of_week", "month", "active_vehicles"]
+REFERENCE_PATH = os.path.join("data", "uber_processed.csv")
+
+FLUSH_SECONDS = float(os.environ.get("MONITOR_FLUSH_SECONDS", "1.0"))
+PSI_WINDOW_FLUSHES = 300  # rolling PSI window = last N flushes
+MAPE_WINDOW = 1000  # rolling MAPE over the last N joined predictions
+# Predictions kept waiting for their actuals, across all workers (oldest evicted first).
+# Size it to the predictions served during the longest expected actuals delay.
+MAX_PENDING = int(os.environ.get("MONITOR_MAX_PENDING", "100000"))
+ACTUAL_RETRY_SECONDS = 30.0  # an actual may beat its prediction's flush; retry this long
+WORKER_STALE_SECONDS = 60.0  # workers silent for longer are left out of /monitoring
+RESERVOIR_SIZE = 500
+ID_BLOCK = 65_536  # prediction ids reserved from the store at a time, per worker
+
+# Fixed bins for the calendar features; active_vehicles uses reference deciles
+CALENDAR_EDGES = {
+    "hour": np.arange(0, 25),
+    "day": np.arange(1, 33),
+    "day_of_week": np.arange(0, 8),
+    "month": np.arange(1, 14),
+}
+
+
+class TDigest:
+    """Merging t-digest (k1 scale function) for streaming quantiles."""
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+
+    @property
+    def count(self) -> float:
+        return float(self.weights.sum())
+
+    def _k(self, q: float) -> float:
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _k_inv(self, k: float) -> float:
+        k = min(k, self.compression / 4)
+        return (math.sin(2 * math.pi * k / self.compression) + 1) / 2
+
+    def update(self, values, weights=None) -> None:
+        values = np.asarray(values, dtype=float)
+        if values.size == 0:
+            return
+        weights = np.ones(values.size) if weights is None else np.asarray(weights, dtype=float)
+        means = np.concatenate([self.means, values])
+        weights = np.concatenate([self.weights, weights])
+        order = np.argsort(means, kind="mergesort")
+        means, weights = means[order], weights[order]
+        total = weights.sum()
+
+        new_means, new_weights = [], []
+        cur_m, cur_w = means[0], weights[0]
+        w_so_far = 0.0
+        q_limit = self._k_inv(self._k(0.0) + 1)
+        for m, w in zip(means[1:], weights[1:]):
+            if (w_so_far + cur_w + w) / total <= q_limit:
+                cur_m += (m - cur_m) * w / (cur_w + w)
+                cur_w += w
+            else:
+                new_means.append(cur_m)
+                new_weights.append(cur_w)
+                w_so_far += cur_w
+                q_limit = self._k_inv(self._k(w_so_far / total) + 1)
+                cur_m, cur_w = m, w
+        new_means.append(cur_m)
+        new_weights.append(cur_w)
+        self.means = np.array(new_means)
+        self.weights = np.array(new_weights)
+
+    def quantile(self, q: float):
+        if self.means.size == 0:
+            return None
+        centers = np.cumsum(self.weights) - self.weights / 2
+        return float(np.interp(q * self.weights.sum(), centers, self.means))
+
+
+class Reservoir:
+    """Uniform sample of everything seen so far (Algorithm R)."""
+
+    def __init__(self, size: int = RESERVOIR_SIZE, seed: int = 42):
+        self.size = size
+        self.items = []
+        self.seen = 0
+        self._rng = random.Random(seed)
+
+    def extend(self, items) -> None:
+        for item in items:
+            self.seen += 1
+            if len(self.items) < self.size:
+                self.items.append(item)
+            else:
+                j = self._rng.randrange(self.seen)
+                if j < self.size:
+                    self.items[j] = item
+
+
+def _bin_index(edges: np.ndarray, values: np.ndarray) -> np.ndarray:
+    # Out-of-range values are clipped into the first / last bin
+    idx = np.searchsorted(edges, values, side="right") - 1
+    return np.clip(idx, 0, len(edges) - 2)
+
+
+def psi(reference: np.ndarray, current: np.ndarray, eps: float = 1e-4):
+    if current.sum() == 0 or reference.sum() == 0:
+        return None
+    ref = np.maximum(reference / reference.sum(), eps)
+    cur = np.maximum(current / current.sum(), eps)
+    return float(np.sum((cur - ref) * np.log(cur / ref)))
+
+
+def load_reference(path: str = REFERENCE_PATH):
+    """Bin edges and reference histograms from the training data."""
+    if not os.path.exists(path):
+        return None, None
+    with open(path, newline="") as f:
+        rows = list(csv.DictReader(f))
+    columns = {name: np.array([float(r[name]) for r in rows]) for name in FEATURES}
+
+    edges = dict(CALENDAR_EDGES)
+    deciles = np.unique(np.quantile(columns["active_vehicles"], np.linspace(0, 1, 11)))
+    edges["active_vehicles"] = deciles
+    reference = {
+        name: np.bincount(_bin_index(edges[name], columns[name]), minlength=len(edges[name]) - 1)
+        for name in FEATURES
+    }
+    return edges, reference
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT, id INTEGER UNIQUE NOT NULL, predicted REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS errors (seq INTEGER PRIMARY KEY AUTOINCREMENT, error REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS workers (pid INTEGER PRIMARY KEY, updated REAL NOT NULL, stats TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS id_blocks (name TEXT PRIMARY KEY, next INTEGER NOT NULL);
+"""
+
+
+def private_store_path() -> str:
+    return os.path.join(tempfile.gettempdir(), f"uber_trip_monitoring-{os.getpid()}.sqlite")
+
+
+def remove_store(path: str) -> None:
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(path + suffix)
+        except FileNotFoundError:
+            pass
+
+
+def connect_store(path: str) -> sqlite3.Connection:
+    db = sqlite3.connect(path, timeout=10, check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.executescript(SCHEMA)
+    return db
+
+
+def allocate_ids(db: sqlite3.Connection, size: int) -> int:
+    """Reserve `size` consecutive prediction ids shared by every worker; returns the first."""
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        row = db.execute("SELECT next FROM id_blocks WHERE name = 'prediction'").fetchone()
+        first = row[0] if row else 1
+        db.execute("INSERT OR REPLACE INTO id_blocks (name, next) VALUES ('prediction', ?)", (first + size,))
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return first
+
+
+class PredictionMonitor:
+    def __init__(self, flush_seconds: float = FLUSH_SECONDS, db_path: str = None):
+        self.flush_seconds = flush_seconds
+        self.db_path = db_path or os.environ.get("MONITOR_DB")
+        # A private store belongs to the process that created it (not to forked children)
+        self._owner_pid = os.getpid() if self.db_path is None else None
+        if self.db_path is None:
+            self.db_path = private_store_path()
+        self._db = None
+        self._predictions = deque()
+        self._batches = deque()
+        self._actuals = deque()
+        self._retry = []  # (prediction_id, actual, first_seen) not yet in the store
+        # Ids come in blocks from the store: small (JSON-number safe) and unique across workers
+        self._next_id = 0
+        self._id_end = 0
+        self._ids_db = None
+        self._id_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.edges = None
+        self.reference = None
+        self.histograms = {}
+        self._window = deque()
+        self._window_sum = {}
+        self.digest = TDigest()
+        self.reservoir = Reservoir()
+        self.served = 0
+        self.joined = 0
+        self.unmatched_actuals = 0
+        self.last_flush = None
+
+    # === Request path ===
+    def record(self, row, prediction: float) -> int:
+        prediction_id = self._take_ids(1)
+        self._predictions.append((prediction_id, row, prediction))
+        return prediction_id
+
+    def record_batch(self, X: np.ndarray, predictions: np.ndarray) -> int:
+        """Record a whole batch under consecutive ids; returns the first id."""
+        first_id = self._take_ids(len(predictions))
+        self._batches.append((first_id, X, predictions))
+        return first_id
+
+    def _take_ids(self, n: int) -> int:
+        with self._id_lock:
+            if self._next_id + n > self._id_end:
+                self._reserve_ids(max(ID_BLOCK, n))
+            first_id = self._next_id
+            self._next_id += n
+        return first_id
+
+    def _reserve_ids(self, size: int) -> None:
+        # Caller holds _id_lock. Rare (once per ID_BLOCK ids): one short write to the store
+        if self._ids_db is None:
+            self._ids_db = connect_store(self.db_path)
+        self._next_id = allocate_ids(self._ids_db, size)
+        self._id_end = self._next_id + size
+
+    def record_actual(self, prediction_id: int, actual: float) -> None:
+        self._actuals.append((prediction_id, actual))
+
+    # === Lifecycle ===
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        # Reserve the first id block now rather than on the first request
+        with self._id_lock:
+            self._reserve_ids(ID_BLOCK)
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="prediction-monitor", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.flush()
+        # A cleanly stopped worker leaves /monitoring now, not after WORKER_STALE_SECONDS
+        with self._db:
+            self._db.execute("DELETE FROM workers WHERE pid = ?", (os.getpid(),))
+        with self._id_lock:
+            for db in (self._db, self._ids_db):
+                if db is not None:
+                    db.close()
+            self._db = self._ids_db = None
+            self._next_id = self._id_end = 0
+        if self._owner_pid == os.getpid():
+            remove_store(self.db_path)
+
+    def _run(self) -> None:
+        try:
+            edges, reference = load_reference()
+        except Exception as e:
+            edges, reference = None, None
+            print("❌ Monitoring reference failed to load:", str(e))
+        with self._lock:
+            self.edges, self.reference = edges, reference
+            if edges is not None:
+                self.histograms = {n: np.zeros(len(edges[n]) - 1, dtype=np.int64) for n in FEATURES}
+                self._window_sum = {n: np.zeros_like(h) for n, h in self.histograms.items()}
+        while not self._stop.wait(self.flush_seconds):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print("❌ Monitoring store flush failed:", str(e))
+
+    # === Background aggregation ===
+    def flush(self) -> None:
+        singles = [self._predictions.popleft() for _ in range(len(self._predictions))]
+        batches = [self._batches.popleft() for _ in range(len(self._batches))]
+        actuals = [self._actuals.popleft() for _ in range(len(self._actuals))]
+
+        parts = [(first + np.arange(len(p)), np.asarray(X, float), np.asarray(p, float)) for first, X, p in batches]
+        if singles:
+            ids, rows, preds = zip(*singles)
+            parts.append((np.array(ids), np.asarray(rows, float), np.asarray(preds, float)))
+
+        served = []
+        if parts:
+            # Id order == arrival order, so the store evicts the oldest first
+            ids = np.concatenate([part[0] for part in parts])
+            order = np.argsort(ids, kind="stable")
+            ids = ids[order].tolist()
+            X = np.concatenate([part[1] for part in parts])[order]
+            preds = np.concatenate([part[2] for part in parts])[order]
+            served = list(zip(ids, preds.tolist()))
+            with self._lock:
+                self.served += len(ids)
+                self.digest.update(preds)
+                self.reservoir.extend(zip(ids, X.tolist(), preds.tolist()))
+                self._add_histograms(X)
+
+        if self._db is None:
+            self._db = connect_store(self.db_path)
+        now = time.time()
+        with self._db:
+            if served:
+                self._db.executemany("INSERT OR REPLACE INTO predictions (id, predicted) VALUES (?, ?)", served)
+                self._db.execute(
+                    "DELETE FROM predictions WHERE seq <= (SELECT MAX(seq) FROM predictions) - ?", (MAX_PENDING,)
+                )
+            self._join_actuals(self._retry + [(i, a, now) for i, a in actuals], now)
+            with self._lock:
+                self.last_flush = now
+                stats = self._worker_stats()
+            self._db.execute(
+                "INSERT OR REPLACE INTO workers (pid, updated, stats) VALUES (?, ?, ?)",
+                (os.getpid(), now, json.dumps(stats)),
+            )
+
+    def _join_actuals(self, waiting: list, now: float) -> None:
+        """Match actuals against every worker's predictions; unseen ids are retried for a while."""
+        found = {}
+        ids = [prediction_id for prediction_id, _, _ in waiting]
+        for i in range(0, len(ids), 500):  # stay under SQLite's bound-parameter limit
+            chunk = ids[i : i + 500]
+            marks = ",".join("?" * len(chunk))
+            found.update(self._db.execute(f"SELECT id, predicted FROM predictions WHERE id IN ({marks})", chunk))
+
+        errors, retry, unmatched = [], [], 0
+        for prediction_id, actual, first_seen in waiting:
+            predicted = found.pop(prediction_id, None)
+            if predicted is None and now - first_seen < ACTUAL_RETRY_SECONDS:
+                retry.append((prediction_id, actual, first_seen))
+            elif predicted is None or actual == 0:
+                unmatched += 1
+            else:
+                errors.append((abs(actual - predicted) / abs(actual),))
+                self._db.execute("DELETE FROM predictions WHERE id = ?", (prediction_id,))
+
+        if errors:
+            self._db.executemany("INSERT INTO errors (error) VALUES (?)", errors)
+            self._db.execute("DELETE FROM errors WHERE seq <= (SELECT MAX(seq) FROM errors) - ?", (MAPE_WINDOW,))
+        self._retry = retry
+        with self._lock:
+            self.joined += len(errors)
+            self.unmatched_actuals += unmatched
+
+    def _add_histograms(self, X: np.ndarray) -> None:
+        if self.edges is None:
+            return
+        counts = {}
+        for col, name in enumerate(FEATURES):
+            edges = self.edges[name]
+            counts[name] = np.bincount(_bin_index(edges, X[:, col]), minlength=len(edges) - 1)
+            self.histograms[name] += counts[name]
+            self._window_sum[name] += counts[name]
+        # Rolling window: add the newest flush, retire the oldest
+        self._window.append(counts)
+        if len(self._window) > PSI_WINDOW_FLUSHES:
+            oldest = self._window.popleft()
+            for name in FEATURES:
+                self._window_sum[name] -= oldest[name]
+
+    # === Reporting ===
+    def _worker_stats(self) -> dict:
+        return {
+            "served": self.served,
+            "queued": len(self._predictions) + len(self._batches),
+            "joined": self.joined,
+            "unmatched": self.unmatched_actuals,
+            "retrying": len(self._retry),
+            "histograms": {n: h.tolist() for n, h in self.histograms.items()},
+            "window": {n: h.tolist() for n, h in self._window_sum.items()},
+            "digest": [self.digest.means.tolist(), self.digest.weights.tolist()],
+            "reservoir_size": len(self.reservoir.items),
+        }
+
+    def snapshot(self) -> dict:
+        """Aggregates merged across every worker that flushed within WORKER_STALE_SECONDS."""
+        db = connect_store(self.db_path)
+        try:
+            workers = db.execute(
+                "SELECT updated, stats FROM workers WHERE updated >= ?", (time.time() - WORKER_STALE_SECONDS,)
+            ).fetchall()
+            pending = db.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+            n_errors, error_sum = db.execute("SELECT COUNT(*), TOTAL(error) FROM errors").fetchone()
+        finally:
+            db.close()
+
+        stats = [json.loads(row[1]) for row in workers]
+        counters = ("served", "queued", "joined", "unmatched", "retrying", "reservoir_size")
+        total = {key: sum(s[key] for s in stats) for key in counters}
+        digest = TDigest()
+        for means, weights in (s["digest"] for s in stats):
+            digest.update(means, weights)
+
+        with self._lock:
+            edges, reference = self.edges, self.reference
+        histograms, window = {}, {}
+        if edges is not None:
+            for n in FEATURES:
+                empty = np.zeros(len(edges[n]) - 1, dtype=np.int64)
+                histograms[n] = sum((np.array(s["histograms"].get(n, empty)) for s in stats), empty)
+                window[n] = sum((np.array(s["window"].get(n, empty)) for s in stats), empty)
+        drift = {}
+        if reference is not None:
+            drift = {n: psi(reference[n], window[n]) for n in FEATURES}
+        return {
+            "workers": len(stats),
+            "served": total["served"],
+            "queued": total["queued"],
+            "joined_actuals": total["joined"],
+            "unmatched_actuals": total["unmatched"],
+            "retrying_actuals": total["retrying"],
+            "pending_actuals": pending,
+            "rolling_mape_pct": round(100 * error_sum / n_errors, 3) if n_errors else None,
+            "psi": drift,
+            "prediction_quantiles": {
+                f"p{int(q * 100)}": digest.quantile(q) for q in (0.5, 0.9, 0.99)
+            },
+            "histograms": {
+                n: {"edges": edges[n].tolist(), "counts": h.tolist()} for n, h in histograms.items()
+            },
+            "reservoir_size": total["reservoir_size"],
+            "last_flush": max((row[0] for row in workers), default=None),
+        }
+
+
+monitor = PredictionMonitor()
@@ -0,0 +1,38 @@
+# app/training.py (training-only code, kept off the serving import path)
+
+import pandas as pd
+import pickle
+import os
+from sklearn.model_selection import train_test_split
+from xgboost import XGBRegressor
+from app.model import MODEL_DIR, MODEL_PATH, export_forest
+
+
+def load_data(filepath: str) -> pd.DataFrame:
+    df = pd.read_csv(filepath)
+    df["datetime"] = pd.to_datetime(df["date"])
+    df["Hour"] = 0  # static for daily aggregate
+    df["Day"] = df["datetime"].dt.day
+    df["DayOfWeek"] = df["datetime"].dt.dayofweek
+    df["Month"] = df["datetime"].dt.month
+    return df
+
+
+def preprocess_data(df: pd.DataFrame) -> tuple:
+    X = df[["Hour", "Day", "DayOfWeek", "Month", "active_vehicles"]]
+    y = df["trips"]
+    return train_test_split(X, y, test_size=0.3, random_state=42)
+
+
+def train_and_save_model(filepath: str = "data/Uber-Jan-Feb-FOIL.csv") -> None:
+    df = load_data(filepath)
+    X_train, X_test, y_train, y_test = preprocess_data(df)
+    model = XGBRegressor(
+        objective="reg:squarederror", n_estimators=300, max_depth=6, learning_rate=0.1
+    )
+    model.fit(X_train, y_train)
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    with open(MODEL_PATH, "wb") as f:
+        pickle.dump(model, f)
+    export_forest(model)
+    print(f"✅ Model trained and saved to {MODEL_PATH}")
@@ -0,0 +1,106 @@
+# gunicorn.conf.py (multi-worker serving with a shared, pre-fork loaded model)
+#
+# The app (and therefore the pickled model) is imported once in the gunicorn
+# master via `preload_app`, then workers are forked from it. The model's tree
+# buffers live in pages the workers only ever read, so they stay shared through
+# copy-on-write instead of being duplicated per worker.
+#
+# Worker sizing (inference is CPU-bound, so we size against cores, not 2n+1):
+#   workers = usable_cores (one worker per core)
+#   usable_cores honours CPU affinity and cgroup CPU quotas (cpu.max / CFS).
+#   Serving predicts with the NumPy forest and a single-threaded booster per worker,
+#   so each worker uses about one core.
+#   - WEB_CONCURRENCY: explicit worker count, overrides the formula.
+#   - MODEL_THREADS (default 1): only used by the pickle fallback (no valid forest),
+#     as XGBRegressor n_jobs / OMP_NUM_THREADS. If you raise it for that case,
+#     lower WEB_CONCURRENCY to cores // MODEL_THREADS yourself.
+
+import gc
+import multiprocessing
+import os
+import tempfile
+
+
+def _cgroup_cpu_limit():
+    # CFS quota in CPUs (cgroup v2 `cpu.max`, then v1), or None when unlimited
+    candidates = [
+        ("/sys/fs/cgroup/cpu.max", None),
+        ("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "/sys/fs/cgroup/cpu/cpu.cfs_period_us"),
+    ]
+    for quota_path, period_path in candidates:
+        try:
+            with open(quota_path) as f:
+                fields = f.read().split()
+            if period_path is not None:
+                with open(period_path) as f:
+                    fields.append(f.read().strip())
+        except OSError:
+            continue
+        quota, period = fields[0], fields[1] if len(fields) > 1 else "100000"
+        if quota == "max" or int(quota) <= 0:
+            return None
+        return int(quota) / int(period)
+    return None
+
+
+def _usable_cores() -> int:
+    # Respect CPU affinity / container cpusets where the platform exposes it
+    if hasattr(os, "sched_getaffinity"):
+        cores = len(os.sched_getaffinity(0))
+    else:
+        cores = multiprocessing.cpu_count()
+    # ...and CPU quotas, which affinity doesn't reflect (e.g. fractional-CPU plans)
+    limit = _cgroup_cpu_limit()
+    if limit is not None:
+        cores = min(cores, max(1, int(limit)))
+    return cores
+
+
+model_threads = max(1, int(os.environ.get("MODEL_THREADS", "1")))
+
+# Pickle fallback only: sizes OpenMP if that path imports xgboost
+os.environ.setdefault("OMP_NUM_THREADS", str(model_threads))
+
+# One monitoring store per master, shared by its workers and fresh on every start, so
+# other processes on the host (tests, loadtest.py) never mix into /monitoring
+owns_monitor_db = "MONITOR_DB" not in os.environ
+if owns_monitor_db:
+    os.environ["MONITOR_DB"] = os.path.join(
+        tempfile.gettempdir(), f"uber_trip_monitoring-master-{os.getpid()}.sqlite"
+    )
+
+
+def _remove_monitor_db():
+    for suffix in ("", "-wal", "-shm"):
+        try:
+            os.remove(os.environ["MONITOR_DB"] + suffix)
+        except FileNotFoundError:
+            pass
+
+
+if owns_monitor_db:
+    _remove_monitor_db()  # left behind by a crashed master that had our pid
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+workers = int(
+    os.environ.get("WEB_CONCURRENCY", _usable_cores())
+)
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+timeout = 60
+keepalive = 5
+
+
+def on_exit(server):
+    if owns_monitor_db:
+        _remove_monitor_db()
+
+
+def when_ready(server):
+    # Move everything loaded so far (model included) into the permanent GC
+    # generation so collections in the workers never touch (and copy) it.
+    gc.freeze()
+    server.log.info(
+        "✅ Model preloaded in master; spawning %s workers (one per usable core)",
+        workers,
+    )
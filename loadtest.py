@@ -0,0 +1,240 @@
+# loadtest.py (open-loop load generator + SLO report for app.main:app)
+#
+#   python loadtest.py --rate 200 --duration 30                          # in-process ASGI client
+#   python loadtest.py --target http://localhost:8000 --rate 500 --out report.json
+#   python loadtest.py --profile predict=80,predict_raw=10,plots=8,dashboard=2
+#
+# Arrivals are scheduled up front (Poisson by default) and fired regardless of how
+# fast responses come back, so a slow server shows up as latency, not as a lower
+# send rate. Latency is measured from each request's *scheduled* time.
+
+import argparse
+import asyncio
+import csv
+import json
+import random
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+DATA_PATH = "data/uber_processed.csv"
+FEATURES = ["hour", "day", "day_of_week", "month", "active_vehicles"]
+PLOT_NAMES = [
+    "xgb_vs_actual",
+    "rf_vs_actual",
+    "ensemble_vs_actual",
+    "trips_per_hour",
+    "trips_per_day",
+    "train_test_split",
+    "decomposition",
+    "shap_summary",
+    "plotly.min.js",
+]
+DEFAULT_PROFILE = "predict=90,dashboard=3,plots=6,pdf=1"
+
+
+class TrafficModel:
+    """Synthesizes TripFeatures rows from the processed data's empirical distribution."""
+
+    def __init__(self, path: str = DATA_PATH, seed: int = 42):
+        with open(path, newline="") as f:
+            self.rows = [[int(r[name]) for name in FEATURES] for r in csv.DictReader(f)]
+        self.rng = random.Random(seed)
+
+    def features(self) -> list:
+        row = list(self.rng.choice(self.rows))
+        # Jitter fleet size so requests aren't exact replays of training rows
+        row[4] = max(0, int(row[4] * self.rng.uniform(0.9, 1.1)))
+        return row
+
+
+def build_requests(traffic: TrafficModel, rng: random.Random, etags: dict) -> dict:
+    def predict():
+        return "POST", "/predict", {"json": dict(zip(FEATURES, traffic.features()))}
+
+    def predict_raw():
+        body = np.array([traffic.features()], dtype="<i4").tobytes()
+        return "POST", "/predict/raw", {"content": body, "headers": {"content-type": "application/octet-stream"}}
+
+    def dashboard():
+        headers = {"if-none-match": etags["/"]} if "/" in etags else {}
+        return "GET", "/", {"headers": headers}
+
+    def plots():
+        path = f"/plots/{rng.choice(PLOT_NAMES)}"
+        # Behave like a browser cache: revalidate what we have already seen
+        headers = {"accept-encoding": "gzip"}
+        if path in etags:
+            headers["if-none-match"] = etags[path]
+        return "GET", path, {"headers": headers}
+
+    def pdf():
+        return "GET", "/export/pdf", {}
+
+    return {"predict": predict, "predict_raw": predict_raw, "dashboard": dashboard, "plots": plots, "pdf": pdf}
+
+
+def parse_profile(spec: str) -> dict:
+    weights = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        weights[name.strip()] = float(weight or 1)
+    return weights
+
+
+def arrival_times(rate: float, duration: float, arrival: str, rng: random.Random) -> list:
+    times, t = [], 0.0
+    while True:
+        t += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+        if t >= duration:
+            return times
+        times.append(t)
+
+
+def summarize(latencies: list) -> dict:
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None, "max_ms": None}
+    ms = np.array(latencies) * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3),
+        "mean_ms": round(float(ms.mean()), 3),
+        "max_ms": round(float(ms.max()), 3),
+    }
+
+
+async def run_load(client: httpx.AsyncClient, args) -> dict:
+    rng = random.Random(args.seed)
+    profile = parse_profile(args.profile)
+    etags = {}
+    makers = build_requests(TrafficModel(args.data, args.seed), rng, etags)
+    unknown = set(profile) - set(makers)
+    if unknown:
+        raise SystemExit(f"Unknown route profile(s): {', '.join(sorted(unknown))}")
+    routes, weights = zip(*profile.items())
+
+    results = defaultdict(lambda: {"latencies": [], "statuses": defaultdict(int), "errors": 0})
+    in_flight = 0
+    dropped = 0
+
+    async def fire(route: str, scheduled: float) -> None:
+        nonlocal in_flight
+        method, path, kwargs = makers[route]()
+        stats = results[route]
+        in_flight += 1
+        try:
+            response = await client.request(method, path, timeout=args.timeout, **kwargs)
+            stats["statuses"][str(response.status_code)] += 1
+            if response.status_code >= 400:
+                stats["errors"] += 1
+            elif "etag" in response.headers:
+                etags[path] = response.headers["etag"]
+        except Exception as e:
+            stats["statuses"][type(e).__name__] += 1
+            stats["errors"] += 1
+        finally:
+            in_flight -= 1
+            stats["latencies"].append(time.perf_counter() - scheduled)
+
+    schedule = arrival_times(args.rate, args.duration, args.arrival, rng)
+    tasks = []
+    start = time.perf_counter()
+    for offset in schedule:
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if in_flight >= args.max_in_flight:
+            dropped += 1
+            continue
+        route = rng.choices(routes, weights)[0]
+        tasks.append(asyncio.create_task(fire(route, start + offset)))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    report = {
+        "target": args.target,
+        "offered_rate_rps": args.rate,
+        "arrival": args.arrival,
+        "duration_s": round(elapsed, 3),
+        "scheduled": len(schedule),
+        "sent": len(tasks),
+        "dropped_max_in_flight": dropped,
+        "routes": {},
+    }
+    all_latencies, total_errors = [], 0
+    for route, stats in sorted(results.items()):
+        all_latencies += stats["latencies"]
+        total_errors += stats["errors"]
+        report["routes"][route] = {
+            "requests": len(stats["latencies"]),
+            "errors": stats["errors"],
+            "throughput_rps": round(len(stats["latencies"]) / elapsed, 2),
+            "statuses": dict(stats["statuses"]),
+            **summarize(stats["latencies"]),
+        }
+    report["overall"] = {
+        "requests": len(all_latencies),
+        "errors": total_errors,
+        "error_rate": round(total_errors / len(all_latencies), 4) if all_latencies else None,
+        # Arrivals never sent because --max-in-flight was reached (not in error_rate)
+        "shed": dropped,
+        "shed_rate": round(dropped / len(schedule), 4) if schedule else None,
+        "throughput_rps": round(len(all_latencies) / elapsed, 2),
+        **summarize(all_latencies),
+    }
+    return report
+
+
+async def main_async(args) -> dict:
+    if args.target == "inproc":
+        from app.main import app
+
+        # ASGITransport doesn't run lifespan events, so start them ourselves
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest") as client:
+                return await run_load(client, args)
+
+    limits = httpx.Limits(max_connections=args.max_in_flight, max_keepalive_connections=args.max_in_flight)
+    async with httpx.AsyncClient(base_url=args.target, limits=limits) as client:
+        return await run_load(client, args)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Open-loop load test for the Uber trip forecasting API")
+    parser.add_argument("--target", default="inproc", help="'inproc' (ASGI, same process) or a base URL")
+    parser.add_argument("--rate", type=float, default=100.0, help="Offered arrival rate (requests/s)")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of arrivals to schedule")
+    parser.add_argument("--arrival", choices=["poisson", "constant"], default="poisson")
+    parser.add_argument("--profile", default=DEFAULT_PROFILE, help="Route weights, e.g. predict=90,plots=10")
+    parser.add_argument("--data", default=DATA_PATH, help="CSV the request features are sampled from")
+    parser.add_argument("--max-in-flight", type=int, default=1000, help="Arrivals beyond this are shed")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", default="loadtest_report.json", help="Where to write the JSON report")
+    args = parser.parse_args()
+
+    report = asyncio.run(main_async(args))
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"\n{'route':<13}{'reqs':>7}{'errors':>8}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for route, r in list(report["routes"].items()) + [("overall", report["overall"])]:
+        print(
+            f"{route:<13}{r['requests']:>7}{r['errors']:>8}{r['throughput_rps']:>9}"
+            f"{r['p50_ms'] or '-':>10}{r['p95_ms'] or '-':>10}{r['p99_ms'] or '-':>10}"
+        )
+    overall = report["overall"]
+    print(
+        f"shed (max in flight): {overall['shed']} of {report['scheduled']} arrivals"
+        f" (shed_rate {overall['shed_rate'] or 0:.2%}); error_rate {overall['error_rate'] or 0:.2%}"
+    )
+    print(f"✅ Report saved to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# pipeline/ (single-process offline runner: python -m pipeline run)
@@ -0,0 +1,41 @@
+# pipeline/__main__.py (python -m pipeline run [--only train,predict] [--force] [--jobs N])
+
+import argparse
+import json
+import sys
+import time
+
+from pipeline.runner import STAGES, print_report, run_pipeline, succeeded
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m pipeline", description="Offline training & plotting pipeline")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser(
+        "run",
+        help="Run the selected stages that are stale; their dependencies are loaded from disk, not re-run",
+    )
+    run.add_argument("--only", help=f"Comma-separated stages: {', '.join(st.name for st in STAGES)}")
+    run.add_argument("--force", action="store_true", help="Re-run the selected stages even if up to date")
+    run.add_argument("--jobs", type=int, default=4, help="Max stages running in parallel")
+    run.add_argument("--report", help="Also write the stage report as JSON to this path")
+
+    args = parser.parse_args(argv)
+    only = args.only.split(",") if args.only else None
+
+    t0 = time.perf_counter()
+    reports = run_pipeline(only=only, force=args.force, jobs=args.jobs)
+    print_report(reports)
+    wall = round(time.perf_counter() - t0, 3)
+    print(f"⏱️ Wall time: {wall} s")
+
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump({"wall_seconds": wall, "stages": reports}, f, indent=2)
+
+    return 0 if succeeded(reports) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
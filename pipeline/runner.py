@@ -0,0 +1,240 @@
+# pipeline/runner.py (in-process DAG runner with content-hash skipping)
+#
+# Stages share one artifact dict, so data and models are parsed/unpickled once.
+# A stage is skipped when its key (stage + helper source, input file contents,
+# upstream keys and upstream output contents) matches the last successful run and
+# all its outputs exist; a skipped stage whose artifacts are needed downstream is
+# loaded from disk instead.
+
+import hashlib
+import inspect
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from app import assets, model
+from pipeline import stages as s
+from pipeline import timeseries
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STATE_PATH = ".pipeline_state.json"
+
+
+class Stage:
+    def __init__(self, name, fn, deps=(), inputs=(), outputs=(), loader=None, helpers=()):
+        self.name = name
+        self.fn = fn
+        self.deps = list(deps)
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.loader = loader  # rebuilds the stage's artifacts from disk when skipped
+        self.helpers = list(helpers)  # functions/modules the stage calls into (part of the key)
+
+
+PLOTS = ["xgb_vs_actual", "rf_vs_actual", "ensemble_vs_actual"]
+PLOT_HELPERS = [s._write_html, assets]
+
+STAGES = [
+    # Output-less stages are pure loaders: never "run", only loaded when needed
+    Stage("data", s.load_processed, inputs=[s.DATA_PATH], loader=s.load_processed),
+    Stage(
+        "timeseries",
+        s.load_timeseries,
+        inputs=[s.DATA_PATH],
+        loader=s.load_timeseries,
+        helpers=[timeseries],
+    ),
+    Stage(
+        "train",
+        s.train_models,
+        deps=["data"],
+        outputs=[s.model_path(n) for n in s.MODEL_NAMES] + [model.FOREST_PATH],
+        loader=s.load_models,
+        helpers=[model],
+    ),
+    Stage(
+        "predict",
+        s.predict,
+        deps=["data", "train"],
+        outputs=[s.PREDICTIONS_PATH],
+        loader=s.load_predictions,
+    ),
+    Stage(
+        "shap",
+        s.shap_summary,
+        deps=["data", "train"],
+        outputs=[s.plot_path("shap_summary.html")],
+        helpers=PLOT_HELPERS,
+    ),
+    Stage(
+        "model_plots",
+        s.model_plots,
+        deps=["predict"],
+        outputs=[s.plot_path(f"{p}.html") for p in PLOTS],
+        helpers=PLOT_HELPERS,
+    ),
+    Stage(
+        "eda_plots",
+        s.eda_plots,
+        deps=["timeseries"],
+        outputs=[s.plot_path(f"trips_per_{p}.{ext}") for p in ("hour", "day") for ext in ("html", "png")],
+        helpers=PLOT_HELPERS,
+    ),
+    Stage(
+        "timeseries_plots",
+        s.timeseries_plots,
+        deps=["timeseries"],
+        outputs=[s.plot_path("train_test_split.html"), s.plot_path("decomposition.html")],
+        helpers=PLOT_HELPERS,
+    ),
+    Stage(
+        "assets",
+        s.plot_assets,
+        deps=["shap", "model_plots", "eda_plots", "timeseries_plots"],
+        outputs=[s.plot_path("plotly.min.js")],
+        helpers=[assets],
+    ),
+]
+
+
+def _file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _process_peak_rss_mb():
+    # High-water mark of the whole process when the stage ends, not the stage's own usage
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return round(peak / (1024 * 1024 if os.uname().sysname == "Darwin" else 1024), 1)
+
+
+def _update_with_files(h, paths: list) -> None:
+    for path in paths:
+        h.update(_file_digest(path).encode() if os.path.exists(path) else b"missing")
+
+
+def stage_keys(stages: list) -> dict:
+    by_name = {st.name: st for st in STAGES}
+    keys = {}
+    for stage in stages:  # STAGES is topologically ordered
+        h = hashlib.sha256(inspect.getsource(stage.fn).encode())
+        for helper in stage.helpers:
+            h.update(inspect.getsource(helper).encode())
+        _update_with_files(h, stage.inputs)
+        for dep in stage.deps:
+            # Upstream outputs as well as its key: catches models/CSVs rewritten out of band
+            h.update(keys[dep].encode())
+            _update_with_files(h, by_name[dep].outputs)
+        keys[stage.name] = h.hexdigest()
+    return keys
+
+
+def _closure(names: list, by_name: dict) -> list:
+    needed, todo = set(), list(names)
+    while todo:
+        name = todo.pop()
+        if name not in needed:
+            needed.add(name)
+            todo.extend(by_name[name].deps)
+    return [st for st in STAGES if st.name in needed]
+
+
+def run_pipeline(only=None, force: bool = False, jobs: int = 4, state_path: str = STATE_PATH) -> list:
+    by_name = {st.name: st for st in STAGES}
+    unknown = set(only or []) - set(by_name)
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+    targets = set(only) if only else set(by_name)
+    plan = _closure(sorted(targets), by_name)
+
+    state = {}
+    if os.path.exists(state_path):
+        with open(state_path) as f:
+            state = json.load(f)
+    keys = stage_keys(plan)
+
+    # Decide up front what runs; everything else is skipped or loaded on demand
+    to_run = set()
+    for st in plan:
+        if not st.outputs or st.name not in targets:
+            continue
+        stale = state.get(st.name) != keys[st.name] or not all(map(os.path.exists, st.outputs))
+        if force or stale:
+            to_run.add(st.name)
+    needs_artifacts = {
+        dep for st in plan if st.name in to_run for dep in st.deps if by_name[dep].loader is not None
+    }
+
+    ctx, reports, done, failed = {}, {}, set(), set()
+
+    def execute(st: Stage) -> dict:
+        t0 = time.perf_counter()
+        if st.name in to_run:
+            status, fn = "ran", st.fn
+        elif st.name in needs_artifacts:
+            status, fn = "loaded", st.loader
+        else:
+            return {"stage": st.name, "status": "skipped", "seconds": 0.0, "process_peak_rss_mb": None}
+        ctx.update(fn(ctx))
+        return {
+            "stage": st.name,
+            "status": status,
+            "seconds": round(time.perf_counter() - t0, 3),
+            "process_peak_rss_mb": _process_peak_rss_mb(),
+        }
+
+    pending = list(plan)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as pool:
+        while pending or running:
+            for st in list(pending):
+                if any(d in failed for d in st.deps):
+                    pending.remove(st)
+                    failed.add(st.name)
+                    reports[st.name] = {"stage": st.name, "status": "blocked", "seconds": 0.0, "process_peak_rss_mb": None}
+                elif all(d in done for d in st.deps):
+                    pending.remove(st)
+                    running[pool.submit(execute, st)] = st
+            if not running:
+                continue
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                st = running.pop(future)
+                try:
+                    reports[st.name] = future.result()
+                    done.add(st.name)
+                    if st.name in to_run:
+                        # Re-key now that upstream outputs are final (they may have just been rewritten)
+                        state[st.name] = stage_keys(_closure([st.name], by_name))[st.name]
+                except Exception as e:
+                    failed.add(st.name)
+                    state.pop(st.name, None)
+                    reports[st.name] = {"stage": st.name, "status": "failed", "error": str(e), "seconds": 0.0, "process_peak_rss_mb": None}
+                    print(f"❌ Stage {st.name} failed:", str(e))
+
+    with open(state_path, "w") as f:
+        json.dump(state, f, indent=2)
+    return [reports[st.name] for st in plan]
+
+
+def succeeded(reports: list) -> bool:
+    return not any(r["status"] in ("failed", "blocked") for r in reports)
+
+
+def print_report(reports: list) -> None:
+    print(f"\n{'stage':<18}{'status':<10}{'seconds':>9}{'process peak RSS MB':>21}")
+    for r in reports:
+        peak = "-" if r["process_peak_rss_mb"] is None else r["process_peak_rss_mb"]
+        print(f"{r['stage']:<18}{r['status']:<10}{r['seconds']:>9.3f}{peak:>21}")
+    print(f"{'total':<28}{sum(r['seconds'] for r in reports):>9.3f}  (stage sum; stages overlap)")
@@ -0,0 +1,244 @@
+# pipeline/stages.py (offline stages: each takes the shared artifact dict, returns new artifacts)
+
+import os
+import pandas as pd
+
+DATA_PATH = "data/uber_processed.csv"
+PREDICTIONS_PATH = "data/xgb_predictions.csv"
+MODEL_DIR = "models"
+PLOTS_DIR = "plots"
+
+FEATURES = ["hour", "day", "day_of_week", "month", "active_vehicles"]
+MODEL_FEATURES = ["Hour", "Day", "DayOfWeek", "Month", "active_vehicles"]
+MODEL_NAMES = ["xgb", "rf", "gbr"]
+ENSEMBLE_WEIGHTS = {"xgb": 0.368, "rf": 0.322, "gbr": 0.310}
+SPLIT_DATE = pd.Timestamp("2015-06-01")
+
+
+def model_path(name: str) -> str:
+    return os.path.join(MODEL_DIR, f"{name}_model.pkl")
+
+
+def plot_path(name: str) -> str:
+    return os.path.join(PLOTS_DIR, name)
+
+
+# === Data ===
+def load_processed(ctx: dict) -> dict:
+    df = pd.read_csv(DATA_PATH)
+    df["date"] = pd.to_datetime(df["date"])
+    return {"data": df}
+
+
+def load_timeseries(ctx: dict) -> dict:
+    from pipeline.timeseries import load_series
+
+    # Incremental: only rows appended since the cached refresh are folded in
+    return {"timeseries": load_series(DATA_PATH)}
+
+
+# === Training ===
+def train_models(ctx: dict) -> dict:
+    import joblib
+    from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+    from xgboost import XGBRegressor
+    from app.model import export_forest
+
+    df = ctx["data"]
+    X = df[FEATURES].set_axis(MODEL_FEATURES, axis=1)
+    y = df["trips"]
+
+    models = {
+        "xgb": XGBRegressor(
+            objective="reg:squarederror",
+            n_estimators=300,
+            max_depth=6,
+            learning_rate=0.1,
+            subsample=0.6,
+            colsample_bytree=1.0,
+        ),
+        "rf": RandomForestRegressor(
+            n_estimators=100,
+            max_depth=30,
+            min_samples_split=5,
+            min_samples_leaf=2,
+            max_features=None,
+            random_state=42,
+        ),
+        "gbr": GradientBoostingRegressor(
+            n_estimators=300,
+            learning_rate=0.1,
+            max_depth=5,
+            max_features="sqrt",
+            min_samples_split=5,
+            min_samples_leaf=1,
+            random_state=42,
+        ),
+    }
+
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    for name, model in models.items():
+        model.fit(X, y)
+        joblib.dump(model, model_path(name))
+        print(f"✅ Saved {name.upper()} model to {model_path(name)}")
+
+    # Flatten XGBoost trees for the lightweight serving path
+    export_forest(models["xgb"])
+    return {"models": models}
+
+
+def load_models(ctx: dict) -> dict:
+    import joblib
+
+    return {"models": {name: joblib.load(model_path(name)) for name in MODEL_NAMES}}
+
+
+# === Predictions ===
+def predict(ctx: dict) -> dict:
+    df, models = ctx["data"], ctx["models"]
+    X = df[FEATURES].set_axis(MODEL_FEATURES, axis=1)
+
+    preds = {name: models[name].predict(X) for name in MODEL_NAMES}
+    out_df = pd.DataFrame(
+        {
+            "date": df["date"],
+            "actual": df["trips"],
+            "predicted_xgb": preds["xgb"],
+            "predicted_rf": preds["rf"],
+            "predicted_gbr": preds["gbr"],
+            "predicted_ensemble": sum(ENSEMBLE_WEIGHTS[n] * preds[n] for n in MODEL_NAMES),
+        }
+    )
+    out_df.to_csv(PREDICTIONS_PATH, index=False)
+    print(f"✅ Saved: {PREDICTIONS_PATH} with all models including ensemble")
+    return {"predictions": out_df}
+
+
+def load_predictions(ctx: dict) -> dict:
+    df = pd.read_csv(PREDICTIONS_PATH)
+    df["date"] = pd.to_datetime(df["date"])
+    return {"predictions": df}
+
+
+# === Plots ===
+def _write_html(fig, name: str) -> None:
+    from app.assets import PLOTLY_SRC
+
+    os.makedirs(PLOTS_DIR, exist_ok=True)
+    fig.write_html(plot_path(name), include_plotlyjs=PLOTLY_SRC)
+    print(f"✅ Saved: {plot_path(name)}")
+
+
+def shap_summary(ctx: dict) -> dict:
+    import shap
+    import plotly.express as px
+
+    X = ctx["data"][FEATURES].tail(100).astype(float)
+    shap_values = shap.Explainer(ctx["models"]["xgb"])(X)
+    mean_abs = pd.DataFrame(shap_values.values, columns=FEATURES).abs().mean().sort_values()
+
+    fig = px.bar(
+        x=mean_abs.values,
+        y=mean_abs.index,
+        orientation="h",
+        title="SHAP Feature Importance",
+        labels={"x": "Mean |SHAP value|", "y": "Feature"},
+        color=mean_abs.values,
+        color_continuous_scale="Viridis",
+    )
+    fig.update_layout(template="plotly_white", height=400)
+    _write_html(fig, "shap_summary.html")
+    return {}
+
+
+def model_plots(ctx: dict) -> dict:
+    import plotly.graph_objects as go
+
+    df = ctx["predictions"]
+    for key, column, label, color in [
+        ("xgb_vs_actual", "predicted_xgb", "XGBoost", "orange"),
+        ("rf_vs_actual", "predicted_rf", "Random Forest", "blue"),
+        ("ensemble_vs_actual", "predicted_ensemble", "Ensemble", "green"),
+    ]:
+        fig = go.Figure()
+        fig.add_trace(
+            go.Scatter(x=df["date"], y=df["actual"], name="Actual Trips", line=dict(color="black"))
+        )
+        fig.add_trace(
+            go.Scatter(x=df["date"], y=df[column], name=f"{label} Prediction", line=dict(color=color))
+        )
+        fig.update_layout(
+            title=f"{label} Prediction vs Actual",
+            xaxis_title="Date",
+            yaxis_title="Trips",
+            hovermode="x unified",
+        )
+        _write_html(fig, f"{key}.html")
+    return {}
+
+
+def eda_plots(ctx: dict) -> dict:
+    import plotly.graph_objects as go
+
+    series = ctx["timeseries"]
+    hourly = series.hour_of_day_totals()
+    hourly = hourly[hourly > 0]
+    fig = go.Figure(data=go.Bar(x=hourly.index, y=hourly.values, name="Trips"))
+    fig.update_layout(title="Trips per Hour", xaxis_title="Hour", yaxis_title="Total Trips")
+    _write_html(fig, "trips_per_hour.html")
+    fig.write_image(plot_path("trips_per_hour.png"))
+
+    dow = series.day_of_week_totals()
+    dow = dow[dow > 0]
+    day_names = dow.index.map({0: "Mon", 1: "Tue", 2: "Wed", 3: "Thu", 4: "Fri", 5: "Sat", 6: "Sun"})
+    fig = go.Figure(data=go.Bar(x=day_names, y=dow.values, name="Trips"))
+    fig.update_layout(
+        title="Trips per Day of Week", xaxis_title="Day of Week", yaxis_title="Total Trips"
+    )
+    _write_html(fig, "trips_per_day.html")
+    fig.write_image(plot_path("trips_per_day.png"))
+    return {}
+
+
+def timeseries_plots(ctx: dict) -> dict:
+    import plotly.graph_objects as go
+
+    series = ctx["timeseries"]
+    ts = series.hourly_series()
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=ts.index, y=ts.values, name="Trips", line=dict(color="skyblue")))
+    fig.add_vline(x=SPLIT_DATE, line_dash="dash", line_color="red")
+    fig.add_annotation(
+        x=SPLIT_DATE,
+        y=ts.max(),
+        text="Train/Test Split",
+        showarrow=True,
+        arrowhead=1,
+        yanchor="bottom",
+        ax=0,
+        ay=-40,
+    )
+    fig.update_layout(
+        title="Train/Test Split on Uber Trip Data",
+        xaxis_title="Date",
+        yaxis_title="Trips per Hour",
+    )
+    _write_html(fig, "train_test_split.html")
+
+    decomp_df = series.decomposition().dropna()
+    fig = go.Figure()
+    for col in decomp_df.columns:
+        fig.add_trace(go.Scatter(x=decomp_df.index, y=decomp_df[col], name=col.title()))
+    fig.update_layout(title="Seasonal Decomposition of Uber Trips", xaxis_title="Date")
+    _write_html(fig, "decomposition.html")
+    return {}
+
+
+def plot_assets(ctx: dict) -> dict:
+    from app.assets import precompress, write_plotly_bundle
+
+    write_plotly_bundle()
+    precompress()
+    print("✅ Saved: plots/plotly.min.js & .gz variants")
+    return {}
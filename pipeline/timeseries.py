@@ -0,0 +1,244 @@
+# pipeline/timeseries.py (incremental hourly trip rollups + seasonal decomposition)
+#
+# Keeps a compact columnar cache (data/timeseries_cache.npz) of:
+#   - the dense hourly series (what `resample("h").sum()` produces), daily totals,
+#     day-of-week and hour-of-day totals
+#   - the additive period-24 decomposition used for the dashboard, i.e. the same
+#     centred 2x24 moving-average trend and phase-mean seasonal component as
+#     statsmodels' `seasonal_decompose(model="additive", period=24)`
+#
+# New rows only touch what they affect: rollups are bumped in place, the trend is
+# recomputed from (first changed hour - 12) onwards, and the seasonal phase sums are
+# adjusted by the detrended values that changed. The source CSV is treated as
+# append-only; if its already-ingested prefix changed, the cache is rebuilt. A last
+# line without a newline is only ingested once the file has been left alone for
+# SETTLE_SECONDS, so a row that is still being written is not read half-way.
+
+import hashlib
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from pipeline.stages import DATA_PATH
+
+CACHE_PATH = "data/timeseries_cache.npz"
+# Any edit to this module invalidates caches written by the previous code
+with open(__file__, "rb") as _f:
+    CACHE_VERSION = hashlib.sha256(_f.read()).hexdigest()[:16]
+PERIOD = 24
+HALF = PERIOD // 2
+TREND_FILTER = np.array([0.5] + [1.0] * (PERIOD - 1) + [0.5]) / PERIOD
+EPOCH_DOW = 3  # 1970-01-01 was a Thursday (Monday == 0)
+SETTLE_SECONDS = 2.0
+
+
+class TripSeries:
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.start = 0  # first hour, in hours since the epoch
+        self.hourly = np.zeros(0)
+        self.trend = np.zeros(0)
+        self.detrended = np.zeros(0)
+        self.phase_sum = np.zeros(PERIOD)
+        self.phase_count = np.zeros(PERIOD)
+        self.day_start = 0  # first day, in days since the epoch
+        self.daily = np.zeros(0)
+        self.dow_totals = np.zeros(7)
+        self.hour_totals = np.zeros(PERIOD)
+        self.offset = 0  # bytes of the source CSV already ingested
+        self.digest = ""  # sha256 of those bytes
+
+    # === Persistence ===
+    @classmethod
+    def load(cls, path: str = CACHE_PATH) -> "TripSeries":
+        series = cls()
+        if not os.path.exists(path):
+            return series
+        with np.load(path) as data:
+            if str(data["version"]) != CACHE_VERSION:
+                return series
+            for name in ("hourly", "trend", "detrended", "phase_sum", "phase_count", "daily", "dow_totals", "hour_totals"):
+                setattr(series, name, data[name])
+            series.start = int(data["start"])
+            series.day_start = int(data["day_start"])
+            series.offset = int(data["offset"])
+            series.digest = str(data["digest"])
+        return series
+
+    def save(self, path: str = CACHE_PATH) -> None:
+        np.savez(
+            path,
+            version=CACHE_VERSION,
+            start=self.start,
+            hourly=self.hourly,
+            trend=self.trend,
+            detrended=self.detrended,
+            phase_sum=self.phase_sum,
+            phase_count=self.phase_count,
+            day_start=self.day_start,
+            daily=self.daily,
+            dow_totals=self.dow_totals,
+            hour_totals=self.hour_totals,
+            offset=self.offset,
+            digest=self.digest,
+        )
+
+    # === Ingestion ===
+    def refresh(self, source: str = DATA_PATH) -> int:
+        """Ingest rows appended to `source` since the last refresh; returns the row count."""
+        with open(source, "rb") as f:
+            settled = time.time() - os.fstat(f.fileno()).st_mtime >= SETTLE_SECONDS
+            raw = f.read()
+        header_end = raw.index(b"\n") + 1
+        end = raw.rfind(b"\n") + 1
+        if end < len(raw):
+            if settled:
+                end = len(raw)
+            else:
+                print(f"⏳ Skipping the unterminated last line of {source} until it stops changing")
+
+        if not (self.offset and len(raw) >= self.offset and _sha256(raw[: self.offset]) == self.digest and self._line_closed(raw)):
+            self.reset()
+            self.offset = header_end
+        if end <= self.offset:
+            return 0
+
+        df = pd.read_csv(io.BytesIO(raw[:header_end] + raw[self.offset : end]), usecols=["date", "trips"])
+        hours = pd.to_datetime(df["date"]).to_numpy().astype("datetime64[h]").astype(np.int64)
+        self.update(hours, df["trips"].to_numpy(dtype=float))
+        self.offset = end
+        self.digest = _sha256(raw[:end])
+        return len(df)
+
+    def _line_closed(self, raw: bytes) -> bool:
+        # An ingested unterminated line must have been ended, not extended, since
+        if raw[self.offset - 1 : self.offset] == b"\n":
+            return True
+        return raw[self.offset : self.offset + 1] in (b"", b"\r", b"\n")
+
+    def update(self, hours: np.ndarray, trips: np.ndarray) -> None:
+        """Add trip counts at `hours` (hours since the epoch); late/duplicate hours accumulate."""
+        if hours.size == 0:
+            return
+        first, last = int(hours.min()), int(hours.max())
+        old_n = self.hourly.size
+
+        rebuild = False
+        if self.hourly.size == 0:
+            self.start = first
+        elif first < self.start:
+            # Data before the current origin shifts every phase: prepend and rebuild
+            self.hourly = np.concatenate([np.zeros(self.start - first), self.hourly])
+            self.start = first
+            rebuild = True
+        grow = last - self.start + 1 - self.hourly.size
+        if grow > 0:
+            self.hourly = np.concatenate([self.hourly, np.zeros(grow)])
+
+        idx = hours - self.start
+        np.add.at(self.hourly, idx, trips)
+
+        if rebuild or self.trend.size == 0:
+            self.trend = np.full(self.hourly.size, np.nan)
+            self.detrended = np.full(self.hourly.size, np.nan)
+            self.phase_sum[:] = 0
+            self.phase_count[:] = 0
+            self._update_trend(0)
+        else:
+            pad = self.hourly.size - self.trend.size
+            self.trend = np.concatenate([self.trend, np.full(pad, np.nan)])
+            self.detrended = np.concatenate([self.detrended, np.full(pad, np.nan)])
+            # Growing also makes the trend defined on the old right edge
+            self._update_trend(min(int(idx.min()), old_n))
+
+        self._update_rollups(hours, trips)
+
+    def _update_trend(self, dirty: int) -> None:
+        n = self.hourly.size
+        lo, hi = max(dirty - HALF, HALF), n - HALF  # trend is defined on [HALF, n - HALF)
+        if lo >= hi:
+            return
+        phases = np.arange(lo, hi) % PERIOD
+
+        # Retract the detrended values being replaced from the phase sums
+        old = self.detrended[lo:hi]
+        known = ~np.isnan(old)
+        np.add.at(self.phase_sum, phases[known], -old[known])
+        np.add.at(self.phase_count, phases[known], -1)
+
+        trend = np.convolve(self.hourly[lo - HALF : hi + HALF], TREND_FILTER, mode="valid")
+        self.trend[lo:hi] = trend
+        self.detrended[lo:hi] = self.hourly[lo:hi] - trend
+        np.add.at(self.phase_sum, phases, self.detrended[lo:hi])
+        np.add.at(self.phase_count, phases, 1)
+
+    def _update_rollups(self, hours: np.ndarray, trips: np.ndarray) -> None:
+        days = hours // 24
+        first = int(days.min())
+        if self.daily.size == 0:
+            self.day_start = first
+        elif first < self.day_start:
+            self.daily = np.concatenate([np.zeros(self.day_start - first), self.daily])
+            self.day_start = first
+        grow = int(days.max()) - self.day_start + 1 - self.daily.size
+        if grow > 0:
+            self.daily = np.concatenate([self.daily, np.zeros(grow)])
+
+        np.add.at(self.daily, days - self.day_start, trips)
+        np.add.at(self.dow_totals, (days + EPOCH_DOW) % 7, trips)
+        np.add.at(self.hour_totals, hours % 24, trips)
+
+    # === Views ===
+    def _hour_index(self, size: int, offset: int = 0) -> pd.DatetimeIndex:
+        first = np.datetime64(self.start + offset, "h")
+        return pd.DatetimeIndex(first + np.arange(size), name="date")
+
+    def hourly_series(self) -> pd.Series:
+        return pd.Series(self.hourly, index=self._hour_index(self.hourly.size), name="trips")
+
+    def daily_series(self) -> pd.Series:
+        first = np.datetime64(self.day_start, "D")
+        return pd.Series(self.daily, index=pd.DatetimeIndex(first + np.arange(self.daily.size), name="date"), name="trips")
+
+    def day_of_week_totals(self) -> pd.Series:
+        return pd.Series(self.dow_totals, index=pd.RangeIndex(7, name="day_of_week"), name="trips")
+
+    def hour_of_day_totals(self) -> pd.Series:
+        return pd.Series(self.hour_totals, index=pd.RangeIndex(PERIOD, name="hour"), name="trips")
+
+    def seasonal(self) -> np.ndarray:
+        with np.errstate(invalid="ignore"):
+            means = self.phase_sum / self.phase_count
+        means -= np.nanmean(means)
+        return np.resize(means, self.hourly.size)
+
+    def decomposition(self, since=None) -> pd.DataFrame:
+        """observed / trend / seasonal / resid, NaN at the 12-hour edges like statsmodels."""
+        seasonal = self.seasonal()
+        df = pd.DataFrame(
+            {
+                "observed": self.hourly,
+                "trend": self.trend,
+                "seasonal": seasonal,
+                "resid": self.hourly - self.trend - seasonal,
+            },
+            index=self._hour_index(self.hourly.size),
+        )
+        return df if since is None else df.loc[pd.Timestamp(since) :]
+
+
+def _sha256(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def load_series(source: str = DATA_PATH, cache_path: str = CACHE_PATH) -> TripSeries:
+    """Cached series, brought up to date with `source` (and re-saved if anything changed)."""
+    series = TripSeries.load(cache_path)
+    if series.refresh(source):
+        series.save(cache_path)
+    return series
@@ -8,3 +8,12 @@ def create_lag_features(series, window_size=24):
         X.append(series[i : i + window_size])
         y.append(series[i + window_size])
     return pd.DataFrame(X), pd.Series(y)
+
+
+def hourly_lag_features(window_size=24):
+    # Reads the cached hourly rollup instead of re-resampling the raw CSV.
+    # Not used by the pipeline's train stage (served models take the 5 calendar/fleet features).
+    from pipeline.timeseries import load_series
+
+    series = load_series().hourly_series()
+    return create_lag_features(series.to_numpy(), window_size)
@@ -0,0 +1,75 @@
+# tests/test_model.py (flattened forest vs the xgboost booster it was exported from)
+
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+import xgboost as xgb
+
+from app.model import MODEL_PATH, FlatForest, ServingModel
+
+FEATURES = ["hour", "day", "day_of_week", "month", "active_vehicles"]
+MODEL_FEATURES = ["Hour", "Day", "DayOfWeek", "Month", "active_vehicles"]
+
+
+def _training_data(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(n, 5)).astype(np.float32)
+    y = 3 * X[:, 0] - 2 * np.abs(X[:, 1]) + X[:, 2] * X[:, 3] + rng.normal(scale=0.1, size=n)
+    # Missing values while training make XGBoost learn default-left directions
+    X[rng.random(X.shape) < 0.1] = np.nan
+    return X, y
+
+
+def _assert_parity(forest, booster, X):
+    expected = booster.predict(xgb.DMatrix(X, missing=np.nan, feature_names=booster.feature_names))
+    np.testing.assert_allclose(forest.predict(X), expected, rtol=1e-5, atol=1e-3)
+
+
+@pytest.mark.parametrize("objective", ["reg:squarederror", "reg:absoluteerror", "reg:pseudohubererror"])
+def test_forest_matches_booster_with_missing_values(objective):
+    X, y = _training_data()
+    model = xgb.XGBRegressor(objective=objective, n_estimators=50, max_depth=5, base_score=0.7)
+    model.fit(X, y)
+    forest = FlatForest.from_booster(model.get_booster())
+
+    rows, _ = _training_data(n=500, seed=1)
+    rows[:20] = np.nan  # all-missing rows follow default_left at every split
+    assert np.isnan(rows).any(axis=1).sum() > 100
+    _assert_parity(forest, model.get_booster(), rows)
+    _assert_parity(forest, model.get_booster(), np.nan_to_num(rows))  # NaN-free fast path
+
+
+def test_repo_model_parity():
+    with open(MODEL_PATH, "rb") as f:
+        model = pickle.load(f)
+    booster = model.get_booster()
+    X = pd.read_csv("data/uber_processed.csv")[FEATURES].to_numpy(dtype=np.float32)
+    forest = FlatForest.from_booster(booster)
+    _assert_parity(forest, booster, X)
+    _assert_parity(FlatForest.load(), booster, X)  # the tracked export
+
+    serving = ServingModel(FlatForest.load())
+    serving._load_booster()
+    for n in (1, len(X)):  # forest and booster sides of BOOSTER_MIN_ROWS
+        expected = model.predict(pd.DataFrame(X[:n], columns=MODEL_FEATURES))
+        np.testing.assert_allclose(serving.predict(X[:n]), expected, rtol=1e-5, atol=1e-2)
+
+
+def test_rejects_non_identity_objective():
+    X, y = _training_data()
+    model = xgb.XGBRegressor(objective="count:poisson", n_estimators=5)
+    model.fit(np.nan_to_num(X), np.abs(y))
+    with pytest.raises(ValueError, match="count:poisson"):
+        FlatForest.from_booster(model.get_booster())
+
+
+def test_rejects_categorical_splits():
+    rng = np.random.default_rng(0)
+    X = pd.DataFrame({"c": pd.Categorical(rng.integers(0, 8, 500)), "x": rng.normal(size=500)})
+    y = X["c"].cat.codes.to_numpy() % 3 + X["x"].to_numpy()
+    model = xgb.XGBRegressor(n_estimators=5, tree_method="hist", enable_categorical=True, max_cat_to_onehot=1)
+    model.fit(X, y)
+    with pytest.raises(ValueError, match="Categorical"):
+        FlatForest.from_booster(model.get_booster())
@@ -0,0 +1,73 @@
+# tests/test_timeseries.py (incremental decomposition vs statsmodels)
+
+import io
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+from statsmodels.tsa.seasonal import seasonal_decompose
+
+from pipeline.timeseries import TripSeries, load_series
+
+DATA_PATH = "data/uber_processed.csv"
+
+
+def _expected(source) -> pd.DataFrame:
+    df = pd.read_csv(source, usecols=["date", "trips"], parse_dates=["date"])
+    ts = df.set_index("date")["trips"].resample("h").sum()
+    result = seasonal_decompose(ts, model="additive", period=24)
+    return pd.DataFrame({"trend": result.trend, "seasonal": result.seasonal, "resid": result.resid})
+
+
+def _trips(lines) -> int:
+    return int(pd.read_csv(io.StringIO("".join(lines)))["trips"].sum())
+
+
+@pytest.mark.parametrize("split", [180, 177])
+def test_incremental_append_matches_seasonal_decompose(tmp_path, split):
+    # 180 rows end with 2015-01-30, so the append starts a new day; 177 ends part-way
+    # through that day's rows, so the append also adds to an hour already ingested
+    with open(DATA_PATH) as f:
+        lines = f.readlines()
+    source, cache = tmp_path / "trips.csv", tmp_path / "cache.npz"
+    source.write_text("".join(lines[: split + 1]))
+    load_series(str(source), str(cache))
+
+    source.write_text("".join(lines))
+    decomp = load_series(str(source), str(cache)).decomposition()
+    expected = _expected(DATA_PATH)
+
+    for column in ("trend", "seasonal", "resid"):
+        np.testing.assert_allclose(decomp[column].to_numpy(), expected[column].to_numpy(), rtol=1e-9, atol=1e-6)
+    assert len(decomp.dropna()) == len(expected.dropna()) == 1369
+
+
+def test_unchanged_source_is_not_reingested(tmp_path):
+    source, cache = tmp_path / "trips.csv", tmp_path / "cache.npz"
+    source.write_bytes(open(DATA_PATH, "rb").read())
+    first = load_series(str(source), str(cache))
+    assert first.refresh(str(source)) == 0
+
+
+def test_unterminated_last_line_is_ingested_once_settled(tmp_path):
+    with open(DATA_PATH) as f:
+        lines = f.readlines()
+    source, cache = tmp_path / "trips.csv", tmp_path / "cache.npz"
+    source.write_text("".join(lines[:181]).rstrip("\n"))
+
+    # Still being written: the partial row is left for a later refresh
+    assert load_series(str(source), str(cache)).refresh(str(source)) == 0
+    assert TripSeries.load(str(cache)).hourly.sum() == _trips(lines[:180])
+
+    old = time.time() - 60
+    os.utime(source, (old, old))
+    series = load_series(str(source), str(cache))
+    assert series.hourly.sum() == _trips(lines[:181])
+
+    source.write_text("".join(lines))
+    decomp = load_series(str(source), str(cache)).decomposition()
+    expected = _expected(DATA_PATH)
+    for column in ("trend", "seasonal", "resid"):
+        np.testing.assert_allclose(decomp[column].to_numpy(), expected[column].to_numpy(), rtol=1e-9, atol=1e-6)